@@ -2,6 +2,7 @@ import React, { useEffect, useRef, useState } from 'react';
 import { ComputeEngine } from '@cortex-js/compute-engine';
 import 'mathlive';
 import { Terminal, ArrowRight } from 'lucide-react';
+import { LruCache } from '../lib/lru';
 
 // Declare the generic HTMLElement for math-field to avoid TS errors
 declare global {
@@ -12,6 +13,9 @@ declare global {
     }
 }
 
+// LaTeX longer than this is converted on every input without being cached
+const MAX_CACHED_LATEX_LENGTH = 4096;
+
 interface EquationEditorProps {
     onInsertCode: (code: string) => void;
 }
@@ -21,6 +25,7 @@ export const EquationEditor: React.FC<EquationEditorProps> = ({ onInsertCode })
     const [latex, setLatex] = useState<string>('E = mc^2');
     const [parsedCode, setParsedCode] = useState<string>('');
     const [ce] = useState(() => new ComputeEngine());
+    const [codeCache] = useState(() => new LruCache<string, string>(256));
 
     useEffect(() => {
         // Initialize MathLive field interactions
@@ -75,7 +80,7 @@ export const EquationEditor: React.FC<EquationEditorProps> = ({ onInsertCode })
         return body.replace(/_\./g, '');
     };
 
-    const parseLatex = (paramsLatex: string) => {
+    const latexToCode = (paramsLatex: string): string => {
         try {
             const expr = ce.parse(paramsLatex);
             // Use canonical form effectively to avoid strict type errors for symbolic math
@@ -108,14 +113,19 @@ export const EquationEditor: React.FC<EquationEditorProps> = ({ onInsertCode })
                     // Check if LHS is a valid identifier (simple heuristic) to avoid "2 = 2" assignment
                     // and ensure we output "n = 2" instead of "n === 2"
                     if (/^[a-zA-Z_$][\w$]*$/.test(lhs)) {
-                        setParsedCode(`${lhs} = ${rhsJs}`);
-                        return;
+                        return `${lhs} = ${rhsJs}`;
                     }
                 }
             }
 
             const result = simplified.toString();
 
+            // Check for CortexJS Error output first: compiling an expression that failed to
+            // parse can only throw or emit unusable code, so don't attempt it
+            if (result.includes("Error")) {
+                return "// Complex expression (could not auto-convert to code)";
+            }
+
             // Try automatic JS compilation for non-assignments
             try {
                 const compiledFn = expr.compile();
@@ -123,22 +133,28 @@ export const EquationEditor: React.FC<EquationEditorProps> = ({ onInsertCode })
                     let fnStr = compiledFn.toString();
                     const body = extractJsFromFn(fnStr);
                     // parsedCode will now append this info
-                    setParsedCode(`${result}\n// Native JS: ${body}`);
-                    return;
+                    return `${result}\n// Native JS: ${body}`;
                 }
             } catch (err) {
                 // ignore
             }
 
-            // Check for CortexJS Error output
-            if (result.includes("Error") || result.includes("ErrorCode")) {
-                setParsedCode("// Complex expression (could not auto-convert to code)");
-            } else {
-                setParsedCode(result);
-            }
+            return result;
         } catch (e) {
-            setParsedCode("Parsing error");
+            return "Parsing error";
+        }
+    };
+
+    // Each keystroke re-parses the whole field; edits that revisit an earlier state
+    // (undo, backspace) reuse its conversion. Very long input is not cached.
+    const parseLatex = (paramsLatex: string) => {
+        const cacheable = paramsLatex.length < MAX_CACHED_LATEX_LENGTH;
+        let code = cacheable ? codeCache.get(paramsLatex) : undefined;
+        if (code === undefined) {
+            code = latexToCode(paramsLatex);
+            if (cacheable) codeCache.set(paramsLatex, code);
         }
+        setParsedCode(code);
     };
 
     const handleInsert = () => {
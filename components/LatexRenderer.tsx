@@ -1,7 +1,26 @@
 import React from 'react';
+import { LruCache } from '../lib/lru';
 
 declare const katex: any;
 
+// Rendered KaTeX markup shared by every renderer on the page; the same formulas are rendered
+// again as results, history and tables re-mount
+const katexCache = new LruCache<string, string>(512);
+
+/**
+ * katex.renderToString with a bounded cache keyed on the source and display mode.
+ * Errors propagate to the caller and are not cached.
+ */
+export const renderKatex = (latex: string, displayMode: boolean): string => {
+  const key = `${displayMode ? 'D' : 'I'}${latex}`;
+  let html = katexCache.get(key);
+  if (html === undefined) {
+    html = katex.renderToString(latex, { displayMode, throwOnError: false }) as string;
+    katexCache.set(key, html);
+  }
+  return html;
+};
+
 interface Props {
   content: string;
   className?: string;
@@ -129,42 +148,54 @@ export const splitLatex = (text: string): LatexToken[] => {
 };
 
 
-export const LatexRenderer: React.FC<Props> = ({ content, className = '', renderMarkdown = false }) => {
-  if (!content) return null;
+// One token turned into markup: `html` for KaTeX/markdown output, `text` for literal spans
+interface RenderedPart {
+  html?: string;
+  text?: string;
+}
 
-  const parts = splitLatex(content);
+const renderPart = (part: LatexToken, renderMarkdown: boolean): RenderedPart => {
+  if (part.type === 'block' || part.type === 'inline') {
+    const displayMode = part.type === 'block';
+    // Pre-process LaTeX content for matrix notation if it contains [[
+    const processedContent = part.content.includes('[[') ? formatMatrixToLatex(part.content) : part.content;
 
-  return (
-    <span className={className}>
-      {parts.map((part, index) => {
-        if (part.type === 'block' || part.type === 'inline') {
-          const displayMode = part.type === 'block';
-          // Pre-process LaTeX content for matrix notation if it contains [[
-          const processedContent = part.content.includes('[[') ? formatMatrixToLatex(part.content) : part.content;
-          
+    try {
+      return { html: renderKatex(processedContent, displayMode) };
+    } catch (e) {
+      return { text: displayMode ? `$$${part.content}$$` : `$${part.content}$` };
+    }
+  }
+
+  if (renderMarkdown) {
+      const markedLib = (window as any).marked;
+      if (markedLib) {
           try {
-            const html = katex.renderToString(processedContent, { displayMode, throwOnError: false });
-            return <span key={index} dangerouslySetInnerHTML={{ __html: html }} />;
+              return { html: markedLib.parseInline(part.content, { breaks: true, gfm: true }) };
           } catch (e) {
-            return <span key={index}>{displayMode ? `$$${part.content}$$` : `$${part.content}$`}</span>;
-          }
-        } else {
-          if (!part.content) return null;
-
-          if (renderMarkdown) {
-              const markedLib = (window as any).marked;
-              if (markedLib) {
-                  try {
-                      const html = markedLib.parseInline(part.content, { breaks: true, gfm: true });
-                      return <span key={index} dangerouslySetInnerHTML={{ __html: html }} />;
-                  } catch (e) {
-                      return <span key={index}>{part.content}</span>;
-                  }
-              }
+              return { text: part.content };
           }
-          return <span key={index}>{part.content}</span>;
-        }
-      })}
+      }
+  }
+  return { text: part.content };
+};
+
+export const LatexRenderer: React.FC<Props> = ({ content, className = '', renderMarkdown = false }) => {
+  // Tokenizing and rendering happen in one pass, and only when the inputs change;
+  // parent re-renders reuse the markup instead of re-running KaTeX on every token.
+  const parts = React.useMemo(
+    () => (content ? splitLatex(content).filter(part => part.content || part.type !== 'text').map(part => renderPart(part, renderMarkdown)) : []),
+    [content, renderMarkdown]
+  );
+
+  if (!content) return null;
+
+  return (
+    <span className={className}>
+      {parts.map((part, index) => part.html !== undefined
+        ? <span key={index} dangerouslySetInnerHTML={{ __html: part.html }} />
+        : <span key={index}>{part.text}</span>
+      )}
     </span>
   );
-};
\ No newline at end of file
+};
@@ -1,9 +1,23 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { X, Nu, Play, RefreshCw, AlertTriangle, Terminal, Trash2, Copy, CheckCircle2, Calculator, Sparkles, Mic, ArrowRight } from '../components/icons';
 import { parseNumericalExpression, validateMathResult, solveNumericalWithAI } from '../services/geminiService';
+import { LruCache } from '../lib/lru';
 
 declare const math: any;
 
+// Compiled math.js expressions shared by the numeric integrate/deriv helpers, so repeated
+// evaluations of the same integrand (re-solves, 'ans' follow-ups) skip parsing entirely
+const compiledExpressions = new LruCache<string, any>(128);
+
+const compileExpression = (expression: string) => {
+  let compiled = compiledExpressions.get(expression);
+  if (compiled === undefined) {
+    compiled = math.compile(expression);
+    compiledExpressions.set(expression, compiled);
+  }
+  return compiled;
+};
+
 interface Props {
   isOpen: boolean;
   initialQuery?: string;
@@ -64,8 +78,12 @@ export const NumericalSolver: React.FC<Props> = ({ isOpen, initialQuery, onClose
                      const h = (b - a) / n;
                      let sum = 0;
                      
+                     // Parse once and reuse one evaluation scope for all samples; only the variable binding changes
+                     const compiled = compileExpression(expression);
+                     const evalScope: Record<string, any> = { ...scope };
                      const getVal = (val: number) => {
-                       return math.evaluate(expression, { ...scope, [variable]: val });
+                       evalScope[variable] = val;
+                       return compiled.evaluate(evalScope);
                      };
 
                      const fa = getVal(a);
@@ -89,8 +107,12 @@ export const NumericalSolver: React.FC<Props> = ({ isOpen, initialQuery, onClose
                      if (isNaN(val)) throw new Error("Invalid point for derivative");
 
                      const h = 1e-7;
-                     const f_x_plus_h = math.evaluate(expression, { ...scope, [variable]: val + h });
-                     const f_x_minus_h = math.evaluate(expression, { ...scope, [variable]: val - h });
+                     const compiled = compileExpression(expression);
+                     const evalScope: Record<string, any> = { ...scope };
+                     evalScope[variable] = val + h;
+                     const f_x_plus_h = compiled.evaluate(evalScope);
+                     evalScope[variable] = val - h;
+                     const f_x_minus_h = compiled.evaluate(evalScope);
                      return (f_x_plus_h - f_x_minus_h) / (2 * h);
             };
 
@@ -196,7 +218,9 @@ export const NumericalSolver: React.FC<Props> = ({ isOpen, initialQuery, onClose
           addLog("💾 Updating scope 'ans' with latest result...");
           // Ensure we can parse the result back into a number if possible
           const cleanRes = finalResult.split(' ')[0]; // Handle cases like "1.23 km"
-          const scopeVal = math.evaluate(cleanRes);
+          // Plain numbers (the usual result) convert directly; only other forms go through the parser
+          const numeric = cleanRes.trim() !== '' ? Number(cleanRes) : NaN;
+          const scopeVal = Number.isFinite(numeric) ? numeric : math.evaluate(cleanRes);
           setScope((prev: any) => ({ ...prev, ans: scopeVal }));
       } catch (e) {
           addLog(`⚠️ Could not update result to scope.`);
@@ -2,11 +2,10 @@
 import React, { useEffect, useRef, useState } from 'react';
 import { HistoryItem, ResultPart, Section, TableData } from '../types';
 import { ChartVisualization } from './ChartVisualization';
-import { LatexRenderer, splitLatex } from './LatexRenderer';
+import { LatexRenderer, splitLatex, renderKatex } from './LatexRenderer';
 import { Copy, Sparkles, AlertTriangle, Zap, Brain, Image as ImageIcon, ExternalLink, RefreshCw, ArrowRight, Lightbulb, Mic, Volume2, Check } from '../components/icons';
 
-// Access global KaTeX, Prism, and Marked loaded via script tags
-declare const katex: any;
+// Access global Prism and Marked loaded via script tags (KaTeX goes through renderKatex)
 declare const Prism: any;
 
 interface Props {
@@ -104,10 +103,7 @@ const RobustMarkdown: React.FC<{ content: string }> = ({ content }) => {
       const innerContent = isBlock ? mathFull.slice(2, -2) : mathFull.slice(1, -1);
       
       try {
-          return katex.renderToString(innerContent, { 
-            displayMode: isBlock, 
-            throwOnError: false 
-          });
+          return renderKatex(innerContent, isBlock);
       } catch(e) { 
           return mathFull; 
       }
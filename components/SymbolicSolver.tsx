@@ -4,19 +4,39 @@ import React, { useState, useEffect, useRef } from 'react';
 import { X, Sigma, Play, RefreshCw, AlertTriangle, Terminal, ExternalLink } from '../components/icons';
 import { parseMathCommand, MathCommand, solveMathWithAI, validateMathResult } from '../services/geminiService';
 import { LatexRenderer, formatMatrixToLatex } from './LatexRenderer';
+import { LruCache } from '../lib/lru';
 
 declare const nerdamer: any;
 
-const LOCAL_SUPPORTED_OPS = [
-  'integrate', 'integral', 'integration', 
-  'diff', 'differentiate', 'differentiation', 'derivative', 
-  'solve', 'simplify', 'expand',
-  'factor', 'limit', 'sum', 'evaluate', 
-  'determinant', 'invert', 'taylor'
-];
-
 const getAlgebrite = () => (window as any).Algebrite || (window as any).algebrite;
 const getNerdamer = () => (typeof nerdamer !== 'undefined' ? nerdamer : undefined) || (window as any).nerdamer;
+const getMathjs = () => (window as any).math;
+
+// Largest Hadamard bound (product of row norms, an upper bound on |det|) for which math.js'
+// float LU determinant is rounded back to an exact integer. At this size the rounding error
+// stays far below 0.5; anything larger, non-integer or non-square goes to the exact CAS engines.
+const MATHJS_DET_MAX_BOUND = 2 ** 32;
+
+// Parses a purely numeric matrix literal like [[1,2],[3,4]]; returns null for anything else
+// (symbolic entries, fractions, ragged input)
+const parseNumericMatrix = (str: string): number[][] | null => {
+  try {
+    const rows = JSON.parse(str);
+    const isNumeric = Array.isArray(rows) && rows.length > 0 && Array.isArray(rows[0]) && rows[0].length > 0 &&
+      rows.every((row: any) => Array.isArray(row) && row.length === rows[0].length && row.every((v: any) => typeof v === 'number'));
+    return isNumeric ? rows : null;
+  } catch (e) {
+    return null;
+  }
+};
+
+// Square integer matrices whose determinant math.js can compute exactly (see MATHJS_DET_MAX_BOUND)
+const isSmallIntegerMatrix = (rows: number[][]): boolean => {
+  if (!rows.every(row => row.length === rows.length && row.every(v => Number.isInteger(v)))) return false;
+  let bound = 1;
+  for (const row of rows) bound *= Math.sqrt(row.reduce((sum, v) => sum + v * v, 0));
+  return bound <= MATHJS_DET_MAX_BOUND;
+};
 
 const formatMatrixForNerdamer = (expr: string): string => {
   if (typeof expr !== 'string') return String(expr || '');
@@ -36,78 +56,201 @@ const isValidLimit = (v?: string | null): boolean => {
   return s !== '' && s !== 'null' && s !== 'undefined' && s !== 'none' && s !== 'NaN';
 };
 
-// Canonicalize AI tokens to Library Tokens
-const getCanonicalOp = (op: string): string => {
+// AI operation tokens that map onto a different canonical library operation
+const OP_ALIASES: ReadonlyMap<string, string> = new Map<string, string>([
+  ['integral', 'integrate'], ['integration', 'integrate'],
+  ['differentiate', 'diff'], ['differentiation', 'diff'], ['derivative', 'diff'],
+  ['expand', 'simplify'],
+]);
+
+// Canonicalize AI tokens to Library Tokens; a missing or non-string token maps to '' (no local op)
+const getCanonicalOp = (op: unknown): string => {
+    if (typeof op !== 'string' || !op) return '';
     const o = op.toLowerCase().trim();
-    if (['integrate', 'integral', 'integration'].includes(o)) return 'integrate';
-    if (['diff', 'differentiate', 'differentiation', 'derivative'].includes(o)) return 'diff';
-    if (['simplify', 'expand'].includes(o)) return 'simplify';
-    return o;
+    return OP_ALIASES.get(o) ?? o;
 };
 
-const constructLHSLatex = (cmd: MathCommand): string => {
-  let expr = cmd.expression;
-  const displayExpr = formatMatrixToLatex(expr) || expr; 
-  const valToTex = (v?: string | null) => {
-    if (!v) return '';
-    const l = String(v).toLowerCase();
-    if (l === 'inf' || l === 'infinity') return '\\infty';
-    if (l === '-inf' || l === '-infinity') return '-\\infty';
-    if (l === 'pi') return '\\pi';
-    return String(v);
-  };
+const valToTex = (v?: string | null) => {
+  if (!v) return '';
+  const l = String(v).toLowerCase();
+  if (l === 'inf' || l === 'infinity') return '\\infty';
+  if (l === '-inf' || l === '-infinity') return '-\\infty';
+  if (l === 'pi') return '\\pi';
+  return String(v);
+};
 
-  const op = getCanonicalOp(cmd.operation);
-
-  switch (op) {
-      case 'limit': return `\\lim_{${cmd.variable} \\to ${valToTex(cmd.end)}} ${displayExpr}`;
-      case 'integrate': 
-          const isDefinite = isValidLimit(cmd.start) && isValidLimit(cmd.end);
-          return isDefinite ? `\\int_{${valToTex(cmd.start)}}^{${valToTex(cmd.end)}} ${displayExpr} \\, d${cmd.variable}` : `\\int ${displayExpr} \\, d${cmd.variable}`;
-      case 'diff':
-          return `\\frac{d}{d${cmd.variable}} \\left( ${displayExpr} \\right)`;
-      case 'sum': return `\\sum_{${cmd.variable}=${valToTex(cmd.start)}}^{${valToTex(cmd.end)}} ${displayExpr}`;
-      case 'determinant': return `\\det ${displayExpr}`;
-      case 'invert': return `\\left( ${displayExpr} \\right)^{-1}`;
-      default: return displayExpr;
-  }
+// Left-hand side LaTeX per canonical operation; operations not listed show the expression alone
+const LHS_LATEX: ReadonlyMap<string, (cmd: MathCommand, displayExpr: string) => string> = new Map<string, (cmd: MathCommand, displayExpr: string) => string>([
+  ['limit', (cmd, displayExpr) => `\\lim_{${cmd.variable} \\to ${valToTex(cmd.end)}} ${displayExpr}`],
+  ['integrate', (cmd, displayExpr) => (isValidLimit(cmd.start) && isValidLimit(cmd.end))
+    ? `\\int_{${valToTex(cmd.start)}}^{${valToTex(cmd.end)}} ${displayExpr} \\, d${cmd.variable}`
+    : `\\int ${displayExpr} \\, d${cmd.variable}`],
+  ['diff', (cmd, displayExpr) => `\\frac{d}{d${cmd.variable}} \\left( ${displayExpr} \\right)`],
+  ['sum', (cmd, displayExpr) => `\\sum_{${cmd.variable}=${valToTex(cmd.start)}}^{${valToTex(cmd.end)}} ${displayExpr}`],
+  ['determinant', (_cmd, displayExpr) => `\\det ${displayExpr}`],
+  ['invert', (_cmd, displayExpr) => `\\left( ${displayExpr} \\right)^{-1}`],
+]);
+
+const constructLHSLatex = (cmd: MathCommand): string => {
+  const expr = cmd.expression;
+  const displayExpr = formatMatrixToLatex(expr) || expr;
+  const build = LHS_LATEX.get(getCanonicalOp(cmd.operation));
+  return build ? build(cmd, displayExpr) : displayExpr;
 };
 
+// Bound tokens each engine spells differently, keyed by the lowercased token
+const NERDAMER_CONSTANTS: ReadonlyMap<string, string> = new Map([['inf', 'Infinity'], ['infinity', 'Infinity'], ['forever', 'Infinity'], ['pi', 'PI'], ['e', 'E']]);
+const ALGEBRITE_CONSTANTS: ReadonlyMap<string, string> = new Map([['inf', 'inf'], ['infinity', 'inf'], ['pi', 'pi']]);
+
 const toNerdamerVal = (val?: string | null) => {
   if (val == null || val === '' || !isValidLimit(val)) return '';
-  const v = String(val).toLowerCase();
-  if (v === 'inf' || v === 'infinity' || v === 'forever') return 'Infinity';
-  if (v === 'pi') return 'PI';
-  if (v === 'e') return 'E';
-  return String(val);
+  return NERDAMER_CONSTANTS.get(String(val).toLowerCase()) ?? String(val);
 };
 
 const toAlgebriteVal = (val?: string | null) => {
   if (val == null || val === '' || !isValidLimit(val)) return '';
-  const v = String(val).toLowerCase();
-  if (v === 'infinity' || v === 'inf') return 'inf';
-  if (v === 'pi') return 'pi'; 
-  return String(val);
+  return ALGEBRITE_CONSTANTS.get(String(val).toLowerCase()) ?? String(val);
 };
 
+// Bounds arrive already converted for the target engine ('' when absent), once per solve
+interface OpArgs {
+  expression: string;
+  variable: string;
+  start: string;
+  end: string;
+}
+
+type CommandBuilder = (args: OpArgs) => string;
+
+// Command builders per canonical operation; operations not listed pass the expression through as-is
+const NERDAMER_COMMANDS: ReadonlyMap<string, CommandBuilder> = new Map<string, CommandBuilder>([
+  ['integrate', ({ expression, variable, start, end }) => (start && end)
+    ? `defint(${expression}, ${start}, ${end}, ${variable})`
+    : `integrate(${expression}, ${variable})`],
+  ['diff', ({ expression, variable }) => `diff(${expression}, ${variable})`],
+  ['solve', ({ expression, variable }) => (expression.includes(',') || expression.includes('='))
+    ? `solveEquations(${(expression.startsWith('[') || !expression.includes(',')) ? expression : `[${expression}]`})`
+    : `solve(${expression}, ${variable})`],
+  ['sum', ({ expression, variable, start, end }) => `sum(${expression}, ${variable}, ${start || '0'}, ${end || '10'})`],
+  ['limit', ({ expression, variable, end }) => `limit(${expression}, ${variable}, ${end || 'Infinity'})`],
+  ['factor', ({ expression }) => `factor(${expression})`],
+  ['determinant', ({ expression }) => `determinant(${formatMatrixForNerdamer(expression)})`],
+  ['invert', ({ expression }) => `invert(${formatMatrixForNerdamer(expression)})`],
+  ['taylor', ({ expression, variable, start, end }) => `taylor(${expression}, ${variable}, ${end || '4'}, ${start || '0'})`],
+  ['simplify', ({ expression }) => `simplify(${expression})`],
+]);
+
+const ALGEBRITE_COMMANDS: ReadonlyMap<string, CommandBuilder> = new Map<string, CommandBuilder>([
+  ['integrate', ({ expression, variable, start, end }) => (start && end)
+    ? `defint(${expression},${variable},${start},${end})`
+    : (variable === 'x' ? `integral(${expression})` : `integral(${expression},${variable})`)],
+  ['diff', ({ expression, variable }) => `d(${expression},${variable})`],
+  ['solve', ({ expression, variable }) => expression.includes(',') ? `roots(${expression})` : `roots(${expression},${variable})`],
+  ['sum', ({ expression, variable, start, end }) => `sum(${expression},${variable},${start},${end})`],
+  ['limit', ({ expression, variable, end }) => `limit(${expression},${variable},${end})`],
+  ['factor', ({ expression }) => `factor(${expression})`],
+  ['determinant', ({ expression }) => `det(${formatMatrixForAlgebrite(expression)})`],
+  ['invert', ({ expression }) => `inv(${formatMatrixForAlgebrite(expression)})`],
+  ['taylor', ({ expression, variable, start, end }) => `taylor(${expression},${variable},${start || '0'},${end || '4'})`],
+  ['simplify', ({ expression }) => `simplify(${expression})`],
+]);
+
+// Canonical operations the local engines handle, derived from the command table instead of
+// kept as a separate list: every operation with a command builder, plus 'evaluate' (the
+// expression passed through as-is). Aliases are resolved before this check.
+const LOCAL_SUPPORTED_OPS: ReadonlySet<string> = new Set([
+  ...NERDAMER_COMMANDS.keys(),
+  'evaluate',
+]);
+
+// Operator count above which an expanded polynomial is still handed to the full simplifier
+const SIMPLIFY_OPS_THRESHOLD = 12;
+
+const countOps = (s: string): number => (s.match(/[+\-*/^]/g) || []).length;
+
+// Cheap simplify cascade: nerdamer's simplify() tries every rewrite strategy, which is
+// wasted work on plain polynomials. Those are expanded first and only sent through the
+// full simplifier when neither form is already compact. Anything with function calls
+// or division (trig identities, rational cancellation) takes the full path directly.
+// Input made only of digits and arithmetic operators is plain integer arithmetic, which
+// parsing already folds, so it is returned as parsed.
+// onStep receives each command actually sent to the engine, in order.
+const fastSimplify = (engine: any, expression: string, onStep: (cmd: string) => void) => {
+  const run = (cmd: string) => { onStep(cmd); return engine(cmd); };
+  if (/[a-z]\w*\s*\(|\//i.test(expression)) return run(`simplify(${expression})`);
+  const original = run(expression);
+  if (/^[\d\s+\-*^()]+$/.test(expression)) return original;
+  const expanded = run(`expand(${expression})`);
+  // Serialize and count each candidate once; both feed the comparison and the threshold check
+  const originalText = original.text();
+  const expandedText = expanded.text();
+  const originalOps = countOps(originalText);
+  const expandedOps = countOps(expandedText);
+  const useExpanded = expandedOps <= originalOps;
+  if ((useExpanded ? expandedOps : originalOps) <= SIMPLIFY_OPS_THRESHOLD) return useExpanded ? expanded : original;
+  return run(`simplify(${useExpanded ? expandedText : originalText})`);
+};
+
+// Tiny inputs covering the common operations, run once per page for each engine the first time
+// the solver dialog finds it loaded, so the first real solve doesn't pay the engines' cold-start
+// cost (parser and function tables). Scheduled for idle time to keep the dialog's open smooth.
+const NERDAMER_WARMUP: readonly string[] = ['simplify(sin(x)^2+cos(x)^2)', 'expand((x+1)^3)', 'diff(x^3, x)', 'integrate(x^2, x)', 'solve(x^2-1, x)'];
+const ALGEBRITE_WARMUP: readonly string[] = ['simplify(sin(x)^2+cos(x)^2)', 'd(x^3,x)', 'integral(x^2)', 'roots(x^2-1)', 'det([[1,2],[3,4]])'];
+// Engines whose warm-up has been queued; each is queued at most once per page
+const warmupScheduled = { nerdamer: false, algebrite: false };
+
+const runWhenIdle = (task: () => void) => {
+  const idle = (window as any).requestIdleCallback;
+  if (typeof idle === 'function') idle(task, { timeout: 2000 });
+  else setTimeout(task, 200);
+};
+
+const scheduleWarmEngines = () => {
+  if (!warmupScheduled.nerdamer && getNerdamer()) {
+    warmupScheduled.nerdamer = true;
+    runWhenIdle(() => {
+      const NerdamerEngine = getNerdamer();
+      for (const cmd of NERDAMER_WARMUP) { try { NerdamerEngine(cmd).toTeX(); } catch (e) {} }
+    });
+  }
+  if (!warmupScheduled.algebrite && getAlgebrite()) {
+    warmupScheduled.algebrite = true;
+    runWhenIdle(() => {
+      const AlgebriteEngine = getAlgebrite();
+      for (const cmd of ALGEBRITE_WARMUP) { try { AlgebriteEngine.run(cmd); } catch (e) {} }
+    });
+  }
+};
+
+// Output fragments showing an engine returned the operation unevaluated
+const UNRESOLVED_MARKERS: ReadonlyMap<string, readonly string[]> = new Map<string, readonly string[]>([
+  ['integrate', ['int(', 'integrate(', 'defint(']],
+  ['sum', ['sum(']],
+  ['limit', ['limit(']],
+  ['diff', ['diff(', 'd(', 'derivative(']],
+  ['solve', ['solve(', 'roots(']],
+  ['determinant', ['det(', 'determinant(']],
+  ['invert', ['inv(', 'invert(']],
+]);
+
 const isUnresolved = (output: string, operation: string): boolean => {
   if (!output) return true;
   const out = output.replace(/\s/g, '').toLowerCase();
   const op = getCanonicalOp(operation);
-  const keywords: Record<string, string[]> = {
-    'integrate': ['int(', 'integrate(', 'defint('],
-    'sum': ['sum('],
-    'limit': ['limit('],
-    'diff': ['diff(', 'd(', 'derivative('],
-    'solve': ['solve(', 'roots('],
-    'determinant': ['det(', 'determinant('],
-    'invert': ['inv(', 'invert(']
-  };
-  const checks = keywords[op];
+  const checks = UNRESOLVED_MARKERS.get(op);
   if (checks) { for (const check of checks) { if (out.includes(check)) return true; } }
   return false;
 };
 
+interface LocalResult {
+  latex: string;
+  decimal: string;
+}
+
+// Local engine outputs keyed by engine, operation and arguments. The engines are deterministic,
+// so re-asking the same question (re-solves, re-opened dialogs) skips the CAS run entirely.
+const localResultCache = new LruCache<string, LocalResult>(256);
+
 interface Props {
   isOpen: boolean;
   initialQuery?: string;
@@ -157,6 +300,7 @@ export const SymbolicSolver: React.FC<Props> = ({ isOpen, initialQuery, onClose
       const nCheck = !!getNerdamer();
       const aCheck = !!getAlgebrite();
       setLibraryStatus({ nerdamer: nCheck, algebrite: aCheck });
+      if (nCheck || aCheck) scheduleWarmEngines();
       if ((!nCheck || !aCheck) && attempts < 30) { attempts++; setTimeout(checkLibraries, 200); }
     };
     checkLibraries();
@@ -203,66 +347,47 @@ export const SymbolicSolver: React.FC<Props> = ({ isOpen, initialQuery, onClose
       if (complexityClass === 'impossible_locally' || complexityClass === 'abstract') {
           addLog("🧠 Problem classified as abstract/impossible for local libraries. Bypassing to AI...");
       } else {
+          const nerdamerArgs: OpArgs = { expression, variable, start: toNerdamerVal(start), end: toNerdamerVal(end) };
+          const algebriteArgs: OpArgs = { expression, variable, start: toAlgebriteVal(start), end: toAlgebriteVal(end) };
+
           const runNerdamer = () => {
             const NerdamerEngine = getNerdamer();
             if (!NerdamerEngine) return null;
             try {
-                let nerdString = '';
-                switch (operation) {
-                  case 'integrate': 
-                    nerdString = (isValidLimit(start) && isValidLimit(end)) 
-                      ? `defint(${expression}, ${toNerdamerVal(start)}, ${toNerdamerVal(end)}, ${variable})` 
-                      : `integrate(${expression}, ${variable})`; 
-                    break;
-                  case 'diff':
-                    nerdString = `diff(${expression}, ${variable})`; break;
-                  case 'solve': nerdString = (expression.includes(',') || expression.includes('=')) ? `solveEquations(${(expression.startsWith('[') || !expression.includes(',')) ? expression : `[${expression}]`})` : `solve(${expression}, ${variable})`; break;
-                  case 'sum': 
-                    nerdString = `sum(${expression}, ${variable}, ${toNerdamerVal(start) || '0'}, ${toNerdamerVal(end) || '10'})`; 
-                    break;
-                  case 'limit': nerdString = `limit(${expression}, ${variable}, ${toNerdamerVal(end) || 'Infinity'})`; break;
-                  case 'factor': nerdString = `factor(${expression})`; break;
-                  case 'determinant': nerdString = `determinant(${formatMatrixForNerdamer(expression)})`; break;
-                  case 'invert': nerdString = `invert(${formatMatrixForNerdamer(expression)})`; break;
-                  case 'taylor': nerdString = `taylor(${expression}, ${variable}, ${toNerdamerVal(end) || '4'}, ${toNerdamerVal(start) || '0'})`; break;
-                  case 'simplify': nerdString = `simplify(${expression})`; break;
-                  default: nerdString = expression; break;
-                }
-                addLog(`⚙️ Nerdamer Execution: "${nerdString}"`);
-                const obj = (operation === 'evaluate') ? NerdamerEngine(nerdString).evaluate() : NerdamerEngine(nerdString);
+                const buildNerdamer = NERDAMER_COMMANDS.get(operation);
+                const nerdString = buildNerdamer ? buildNerdamer(nerdamerArgs) : expression;
+                const logStep = (cmd: string) => addLog(`⚙️ Nerdamer Execution: "${cmd}"`);
+                // The simplify cascade logs each step it actually runs
+                if (operation !== 'simplify') logStep(nerdString);
+                const obj = (operation === 'simplify') ? fastSimplify(NerdamerEngine, expression, logStep)
+                  : (operation === 'evaluate') ? NerdamerEngine(nerdString).evaluate() : NerdamerEngine(nerdString);
                 const resultString = obj.text();
                 addLog(`📄 Nerdamer Output: "${resultString}"`);
                 if (isUnresolved(resultString, operation)) return null;
-                let dec = ''; try { dec = obj.evaluate().text('decimals'); } catch(e) {}
+                // 'evaluate' results are already numeric; don't evaluate them a second time
+                let dec = ''; try { dec = (operation === 'evaluate' ? obj : obj.evaluate()).text('decimals'); } catch(e) {}
                 return { latex: obj.toTeX(), decimal: dec };
             } catch (e: any) { return null; }
           };
 
+          const runMathjs = () => {
+             const MathEngine = getMathjs();
+             const matrix = parseNumericMatrix(expression);
+             if (!MathEngine || operation !== 'determinant' || !matrix || !isSmallIntegerMatrix(matrix)) return null;
+             try {
+                  addLog(`⚙️ Math.js Execution: "det(${expression})"`);
+                  const det = Math.round(MathEngine.det(matrix));
+                  addLog(`📄 Math.js Output: "${det}"`);
+                  return { latex: String(det), decimal: String(det) };
+             } catch (e: any) { return null; }
+          };
+
           const runAlgebrite = () => {
              const AlgebriteEngine = getAlgebrite();
              if (!AlgebriteEngine) return null;
              try {
-                  let algString = '';
-                  switch (operation) {
-                    case 'integrate': 
-                      algString = (isValidLimit(start) && isValidLimit(end)) 
-                        ? `defint(${expression},${variable},${toAlgebriteVal(start)},${toAlgebriteVal(end)})` 
-                        : (variable === 'x' ? `integral(${expression})` : `integral(${expression},${variable})`); 
-                      break;
-                    case 'diff':
-                      algString = `d(${expression},${variable})`; break;
-                    case 'solve': algString = expression.includes(',') ? `roots(${expression})` : `roots(${expression},${variable})`; break;
-                    case 'sum': 
-                       algString = `sum(${expression},${variable},${toAlgebriteVal(start)},${toAlgebriteVal(end)})`; 
-                       break;
-                    case 'limit': algString = `limit(${expression},${variable},${toAlgebriteVal(end)})`; break;
-                    case 'factor': algString = `factor(${expression})`; break;
-                    case 'determinant': algString = `det(${formatMatrixForAlgebrite(expression)})`; break;
-                    case 'invert': algString = `inv(${formatMatrixForAlgebrite(expression)})`; break;
-                    case 'taylor': algString = `taylor(${expression},${variable},${toAlgebriteVal(start) || '0'},${toAlgebriteVal(end) || '4'})`; break;
-                    case 'simplify': algString = `simplify(${expression})`; break;
-                    default: algString = expression;
-                  }
+                  const buildAlgebrite = ALGEBRITE_COMMANDS.get(operation);
+                  const algString = buildAlgebrite ? buildAlgebrite(algebriteArgs) : expression;
                   addLog(`⚙️ Algebrite Execution: "${algString}"`);
                   const res = AlgebriteEngine.run(algString);
                   addLog(`📄 Algebrite Output: "${res}"`);
@@ -283,12 +408,21 @@ export const SymbolicSolver: React.FC<Props> = ({ isOpen, initialQuery, onClose
                 } catch (e: any) { return null; }
           };
 
-          const isLocalSupported = LOCAL_SUPPORTED_OPS.includes(rawOp.toLowerCase()) || LOCAL_SUPPORTED_OPS.includes(operation);
-          const pipeline = isLocalSupported ? (command.preferredEngine === 'algebrite' ? [{name:'Algebrite', run:runAlgebrite}, {name:'Nerdamer', run:runNerdamer}] : [{name:'Nerdamer', run:runNerdamer}, {name:'Algebrite', run:runAlgebrite}]) : [];
+          // Every alias canonicalizes to a supported op, so the canonical token alone decides
+          const isLocalSupported = LOCAL_SUPPORTED_OPS.has(operation);
+          const casPipeline = isLocalSupported ? (command.preferredEngine === 'algebrite' ? [{name:'Algebrite', run:runAlgebrite}, {name:'Nerdamer', run:runNerdamer}] : [{name:'Nerdamer', run:runNerdamer}, {name:'Algebrite', run:runAlgebrite}]) : [];
+          const pipeline = operation === 'determinant' ? [{name:'Math.js', run:runMathjs}, ...casPipeline] : casPipeline;
 
           for (const step of pipeline) {
               addLog(`🏃 Attempting engine: ${step.name}`);
-              const output = step.run();
+              const cacheKey = JSON.stringify([step.name, operation, expression, variable, start ?? null, end ?? null]);
+              let output: LocalResult | null | undefined = localResultCache.get(cacheKey);
+              if (output) {
+                  addLog(`♻️ ${step.name} result reused from cache`);
+              } else {
+                  output = step.run();
+                  if (output) localResultCache.set(cacheKey, output);
+              }
               if (output) {
                   const { latex } = output;
                   addLog(`⚖️ AI Validation: Verifying local result...`);
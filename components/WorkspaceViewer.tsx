@@ -138,22 +138,25 @@ interface WorkspaceViewerProps {
 
 export const WorkspaceViewer: React.FC<WorkspaceViewerProps> = ({ variables, onClear, onDeleteVariable }) => {
     const fileInputRef = useRef<HTMLInputElement>(null);
-    const prevVariablesRef = useRef<Variable[]>([]);
+    // Previous values by name, serialized once when they arrive rather than on every comparison
+    const prevSnapshotRef = useRef<Map<string, string | undefined>>(new Map());
     const [highlights, setHighlights] = React.useState<Record<string, 'new' | 'update'>>({});
 
     // Detect changes for highlighting
     useEffect(() => {
-        const prev = prevVariablesRef.current;
+        const prev = prevSnapshotRef.current;
+        const snapshot = new Map<string, string | undefined>();
         const newHighlights: Record<string, 'new' | 'update'> = {};
         let hasChanges = false;
 
         variables.forEach(v => {
-            const oldVar = prev.find(p => p.name === v.name);
-            if (!oldVar) {
+            const serialized = JSON.stringify(v.value);
+            snapshot.set(v.name, serialized);
+            if (!prev.has(v.name)) {
                 // New Variable
                 newHighlights[v.name] = 'new';
                 hasChanges = true;
-            } else if (JSON.stringify(v.value) !== JSON.stringify(oldVar.value)) {
+            } else if (serialized !== prev.get(v.name)) {
                 // Updated Variable
                 newHighlights[v.name] = 'update';
                 hasChanges = true;
@@ -172,7 +175,7 @@ export const WorkspaceViewer: React.FC<WorkspaceViewerProps> = ({ variables, onC
             }, 2000);
         }
 
-        prevVariablesRef.current = variables;
+        prevSnapshotRef.current = snapshot;
     }, [variables]);
 
     const injectData = (name: string, data: any) => {
@@ -0,0 +1,27 @@
+// Small bounded cache built on Map insertion order: a read moves the entry to the
+// back, and a write past capacity evicts the least recently used entry at the front.
+export class LruCache<K, V> {
+    private entries = new Map<K, V>();
+
+    constructor(private readonly maxSize: number) { }
+
+    public get(key: K): V | undefined {
+        if (!this.entries.has(key)) return undefined;
+        const value = this.entries.get(key) as V;
+        this.entries.delete(key);
+        this.entries.set(key, value);
+        return value;
+    }
+
+    public set(key: K, value: V) {
+        this.entries.delete(key);
+        this.entries.set(key, value);
+        if (this.entries.size > this.maxSize) {
+            this.entries.delete(this.entries.keys().next().value as K);
+        }
+    }
+
+    public clear() {
+        this.entries.clear();
+    }
+}
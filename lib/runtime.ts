@@ -2,6 +2,7 @@ import { v4 as uuidv4 } from 'uuid';
 import * as math from 'mathjs';
 import nerdamer from 'nerdamer/all.min';
 import Algebrite from 'algebrite';
+import { LruCache } from './lru';
 
 // Define the shape of our runtime context
 interface RuntimeContext {
@@ -72,6 +73,51 @@ export interface LogEntry {
     timestamp: number;
 }
 
+// Argument list and LaTeX body extracted from a workspace function's source
+interface FunctionDescription {
+    args: string;
+    latex: string | null;
+}
+
+// Globals the runtime installs into the sandbox; never reported as user variables
+const INJECTED_GLOBALS: ReadonlySet<string> = new Set(['plot', 'print', 'math', 'nerdamer', 'Algebrite', 'console', 'interact']);
+
+// Symbolic values longer than this are previewed as truncated plain text instead of converted
+// to LaTeX; the preview keeps the first MAX_PREVIEW_TEXT_LENGTH characters
+const MAX_PREVIEW_EXPR_LENGTH = 5000;
+const MAX_PREVIEW_TEXT_LENGTH = 300;
+
+// Patterns used on every log line / harvested string, compiled once at module load.
+// FRACTION_PATTERN is global but only used with String.replace, which resets lastIndex.
+const FRACTION_PATTERN = /(-?\d+)\/(\d+)/g;
+const MATH_STRING_HEURISTIC = /[+\-*/^=]|\b(sin|cos|tan|log|exp|sqrt|integral|diff)\b/;
+
+// Operators and template literals that occur in JS function bodies but not in math syntax
+const JS_ONLY_SYNTAX = /=>|===|!==|&&|\|\||`/;
+
+// LaTeX-special characters and their text-mode escapes, for showing engine output verbatim
+const TEXT_ESCAPES: Readonly<Record<string, string>> = Object.freeze({
+    '\\': '\\textbackslash{}', '{': '\\{', '}': '\\}', '$': '\\$', '&': '\\&', '#': '\\#',
+    '%': '\\%', '_': '\\_', '^': '\\textasciicircum{}', '~': '\\textasciitilde{}',
+});
+
+// Monospace LaTeX preview of an expression too large to convert, cut to MAX_PREVIEW_TEXT_LENGTH
+const plainTextPreview = (expr: string): string => {
+    const text = expr.slice(0, MAX_PREVIEW_TEXT_LENGTH).replace(/[\\{}$&#%_^~]/g, ch => TEXT_ESCAPES[ch]);
+    return `\\texttt{${text}${expr.length > MAX_PREVIEW_TEXT_LENGTH ? '...' : ''}}`;
+};
+
+// Deep-copies a value out of the sandbox iframe. structuredClone is the browser's native
+// serializer (no intermediate JSON string, typed arrays stay typed); payloads it rejects,
+// such as ones containing functions, fall back to a JSON round-trip.
+const detach = <T>(value: T): T => {
+    try {
+        return structuredClone(value);
+    } catch (e) {
+        return JSON.parse(JSON.stringify(value));
+    }
+};
+
 class Runtime {
     private scope: Record<string, any> = {};
     private onPlot: (plot: PlotData) => void = () => { };
@@ -80,10 +126,8 @@ class Runtime {
     private onInteract: (interaction: Interaction) => void = () => { };
 
     private interactionCallbacks: Record<string, Function> = {};
-
-    constructor() {
-        this.reset();
-    }
+    private latexCache = new LruCache<string, string | null>(512);
+    private functionCache = new WeakMap<Function, FunctionDescription>();
 
     public setCallbacks(
         onPlot: (plot: PlotData) => void,
@@ -114,10 +158,18 @@ class Runtime {
             document.body.removeChild(this.iframe);
             this.iframe = null;
         }
-        this.initIframe();
+        // The sandbox iframe is created on the next execute, not here; nothing is
+        // built at import time or for resets that are never followed by a run
+        this.clearCaches();
         this.notifyVariables();
     }
 
+    // Drop memoized LaTeX conversions and function descriptions from the previous session
+    public clearCaches() {
+        this.latexCache.clear();
+        this.functionCache = new WeakMap();
+    }
+
     public deleteVariable(name: string) {
         if (!this.iframe) return;
         const win = this.iframe.contentWindow as any;
@@ -133,82 +185,27 @@ class Runtime {
     }
 
     private notifyVariables() {
+        // Scoped to this pass: variables holding the same symbolic value are rendered once
+        const latexMemo = new Map<string, string>();
         const vars: Variable[] = Object.entries(this.scope)
             .filter(([_, value]) => value !== undefined) // Filter out undefined (deleted)
             .map(([key, value]) => ({
                 name: key,
                 value: this.formatValue(value),
                 type: this.getType(value),
-                metadata: this.generateMetadata(value, key)
+                metadata: this.generateMetadata(value, key, latexMemo)
             }));
         this.onVariablesUpdate(vars);
     }
 
-    private generateMetadata(value: any, name?: string): VariableMetadata {
+    private generateMetadata(value: any, name?: string, latexMemo?: Map<string, string>): VariableMetadata {
         // 0. Function (JS Arrow or Standard) -> Symbolic
         if (typeof value === 'function') {
-            try {
-                let str = value.toString();
-                let args = '';
-                let body = '';
-
-                // Arrow Function: (t) => ... or t => ...
-                if (str.includes('=>')) {
-                    const parts = str.split('=>');
-                    args = parts[0].trim();
-                    // Remove parentheses from args if needed (t) -> t
-                    if (args.startsWith('(') && args.endsWith(')')) args = args.slice(1, -1);
-
-                    body = parts.slice(1).join('=>').trim(); // Handle nested arrows poorly but good enough
-                }
-                // Standard Function: function(t) { return ... }
-                else if (str.startsWith('function')) {
-                    const argsMatch = str.match(/function\s*\(([^)]*)\)/);
-                    if (argsMatch) args = argsMatch[1].trim();
-
-                    const bodyMatch = str.match(/\{([\s\S]*)\}/);
-                    if (bodyMatch) body = bodyMatch[1].trim();
-                }
-
-                // Cleanup Body
-                if (body) {
-                    // Remove block braces { return x } -> x
-                    if (body.startsWith('{')) {
-                        body = body.replace(/^{|}$/g, '').trim();
-                        // Remove 'return' keyword
-                        body = body.replace(/^return\s+/, '');
-                        // Remove trailing semicolon
-                        if (body.endsWith(';')) body = body.slice(0, -1);
-                    }
-
-                    // Remove 'Math.' prefix for cleaner parsing
-                    // (Math.js handles some built-ins but 'Math.sin' might trip it up if not stripped)
-                    body = body.replace(/Math\./g, '');
-
-                    // Try converting to LaTeX using Math.js (standard lib, handles functions well)
-                    try {
-                        const node = math.parse(body);
-                        const latexBody = node.toTex();
-                        if (latexBody) {
-                            const signature = name ? `${name}(${args})` : '';
-                            return { type: 'symbolic', latex: signature ? `${signature} = ${latexBody}` : latexBody };
-                        }
-                    } catch (e) {
-                        // Math.js failed? Try Nerdamer
-                        try {
-                            const latexBody = nerdamer.convertToLaTeX(body);
-                            if (latexBody) {
-                                const signature = name ? `${name}(${args})` : '';
-                                return { type: 'symbolic', latex: signature ? `${signature} = ${latexBody}` : latexBody };
-                            }
-                        } catch (e2) {
-                            // Fallback: just return the clean string
-                            const signature = name ? `${name}(${args})` : '';
-                            return { type: 'symbolic', latex: signature ? `${signature} = ${body}` : body };
-                        }
-                    }
-                }
-            } catch (e) { }
+            const { args, latex } = this.describeFunction(value);
+            if (latex) {
+                const signature = name ? `${name}(${args})` : '';
+                return { type: 'symbolic', latex: signature ? `${signature} = ${latex}` : latex };
+            }
         }
 
         // 1. Matrix (Math.js)
@@ -284,21 +281,27 @@ class Runtime {
         // Heuristic: Check if it's a Nerdamer object or a string that looks like math
         try {
             // Check for Nerdamer Object
-            if (value && typeof value === 'object' && (value.symbol || (value.toString().match(/[a-z]/i) && !value.isMatrix))) {
-                return { type: 'symbolic', latex: nerdamer(value.toString()).toTeX() };
+            if (value && typeof value === 'object') {
+                const expr = value.toString();
+                // Plain objects stringify to "[object Object]"; handing that to nerdamer only throws
+                if (value.symbol || (!expr.startsWith('[object ') && /[a-z]/i.test(expr) && !value.isMatrix)) {
+                    // Re-parsing a huge expression for a one-line preview costs more than it shows;
+                    // a truncated plain-text form is shown instead
+                    if (expr.length > MAX_PREVIEW_EXPR_LENGTH) return { type: 'symbolic', latex: plainTextPreview(expr) };
+                    return { type: 'symbolic', latex: this.memoLatex(latexMemo, `expr:${expr}`, () => nerdamer(expr).toTeX()) };
+                }
             }
 
             // Check for Math String (Algebrite output or raw string)
             if (typeof value === 'string') {
                 // Heuristic: Contains math operators or functions?
                 // Avoid plain text sentences.
-                const mathHeuristic = /[+\-*/^=]|\b(sin|cos|tan|log|exp|sqrt|integral|diff)\b/;
-                const looksLikeMath = mathHeuristic.test(value) && value.length < 200 && !value.includes(' ');
+                const looksLikeMath = MATH_STRING_HEURISTIC.test(value) && value.length < 200 && !value.includes(' ');
 
                 if (looksLikeMath) {
                     try {
                         // Attempt to convert to LaTeX using Nerdamer
-                        const latex = nerdamer.convertToLaTeX(value);
+                        const latex = this.memoLatex(latexMemo, `str:${value}`, () => nerdamer.convertToLaTeX(value));
                         if (latex && latex.length > 0) {
                             return { type: 'symbolic', latex };
                         }
@@ -315,6 +318,96 @@ class Runtime {
         return { type: 'other' };
     }
 
+    // (args, LaTeX) per function object, dropped once the function is garbage collected
+    private describeFunction(fn: Function): FunctionDescription {
+        const cached = this.functionCache.get(fn);
+        if (cached) return cached;
+
+        let description: FunctionDescription = { args: '', latex: null };
+        try {
+            const str = fn.toString();
+            let args = '';
+            let body = '';
+
+            // Arrow Function: (t) => ... or t => ...
+            const arrow = str.indexOf('=>');
+            if (arrow !== -1) {
+                args = str.slice(0, arrow).trim();
+                // Remove parentheses from args if needed (t) -> t
+                if (args.startsWith('(') && args.endsWith(')')) args = args.slice(1, -1);
+
+                body = str.slice(arrow + 2).trim(); // Handle nested arrows poorly but good enough
+            }
+            // Standard Function: function(t) { return ... }
+            else if (str.startsWith('function')) {
+                const argsMatch = str.match(/function\s*\(([^)]*)\)/);
+                if (argsMatch) args = argsMatch[1].trim();
+
+                const bodyMatch = str.match(/\{([\s\S]*)\}/);
+                if (bodyMatch) body = bodyMatch[1].trim();
+            }
+
+            // Cleanup Body
+            if (body) {
+                // Remove block braces { return x } -> x
+                if (body.startsWith('{')) {
+                    body = body.replace(/^{|}$/g, '').trim();
+                    // Remove 'return' keyword
+                    body = body.replace(/^return\s+/, '');
+                    // Remove trailing semicolon
+                    if (body.endsWith(';')) body = body.slice(0, -1);
+                }
+
+                // Remove 'Math.' prefix for cleaner parsing
+                // (Math.js handles some built-ins but 'Math.sin' might trip it up if not stripped)
+                body = body.replace(/Math\./g, '');
+
+                description = { args, latex: this.bodyToLatex(body) };
+            }
+        } catch (e) { }
+        this.functionCache.set(fn, description);
+        return description;
+    }
+
+    // LaTeX per body string, so re-run code that recreates the same functions still hits
+    private bodyToLatex(body: string): string | null {
+        const cached = this.latexCache.get(body);
+        if (cached !== undefined) return cached;
+
+        // JS-only syntax neither parser accepts; such bodies go straight to the raw fallback
+        // instead of paying for two parse attempts that are bound to throw
+        if (JS_ONLY_SYNTAX.test(body)) {
+            this.latexCache.set(body, body);
+            return body;
+        }
+
+        let latex: string | null;
+        try {
+            // Try converting to LaTeX using Math.js (standard lib, handles functions well)
+            latex = math.parse(body).toTex() || null;
+        } catch (e) {
+            // Math.js failed? Try Nerdamer
+            try {
+                latex = nerdamer.convertToLaTeX(body) || null;
+            } catch (e2) {
+                // Fallback: just return the clean string
+                latex = body;
+            }
+        }
+        this.latexCache.set(body, latex);
+        return latex;
+    }
+
+    private memoLatex(memo: Map<string, string> | undefined, key: string, render: () => string): string {
+        if (!memo) return render();
+        let latex = memo.get(key);
+        if (latex === undefined) {
+            latex = render();
+            memo.set(key, latex);
+        }
+        return latex;
+    }
+
     private getType(value: any): string {
         if (Array.isArray(value)) return `Array(${value.length})`;
         if (value === null) return 'null';
@@ -335,65 +428,93 @@ class Runtime {
         return value;
     }
 
-    public async execute(code: string) {
-        const safeLog = (type: LogType, ...args: any[]) => {
-            let message = args.map(a => (typeof a === 'object' ? this.formatLogObject(a) : String(a))).join(' ');
-
-            // Auto-convert fractions to decimals for better readability
-            // Matches num/denom explicitly. simpler regex is safer for arrays.
-            // e.g. [1/2, 3/4] -> [1/2 (= 0.5), 3/4 (= 0.75)]
-            // e.g. [12345/67890] -> [0.1818] (large numbers replaced)
-            const fractionRegex = /(-?\d+)\/(\d+)/g;
-            message = message.replace(fractionRegex, (match, numStr, denomStr) => {
-                try {
-                    const num = parseInt(numStr);
-                    const denom = parseInt(denomStr);
-                    if (denom === 0) return match; // Avoid division by zero issues
-
-                    const val = num / denom;
-
-                    // Logic: If numbers are "large" (>= 4 digits), simply REPLACE with decimal to reduce noise.
-                    // If numbers are small, keep them and APPEND decimal for clarity.
-                    if (Math.abs(num) > 999 || denom > 999) {
-                        // e.g. 12345/67890 -> 0.181838
-                        return val.toPrecision(6).replace(/\.?0+$/, '');
-                    }
-                    // e.g. 1/3 -> 1/3 (= 0.333333)
-                    return `${match} (= ${val.toPrecision(6).replace(/\.?0+$/, '')})`;
-                } catch (e) {
-                    return match;
+    // Sandbox entry points, bound once and (re)installed on the iframe window before every run
+    private safeLog = (type: LogType, ...args: any[]) => {
+        let message = args.map(a => (typeof a === 'object' ? this.formatLogObject(a) : String(a))).join(' ');
+
+        // Auto-convert fractions to decimals for better readability
+        // Matches num/denom explicitly. simpler regex is safer for arrays.
+        // e.g. [1/2, 3/4] -> [1/2 (= 0.5), 3/4 (= 0.75)]
+        // e.g. [12345/67890] -> [0.1818] (large numbers replaced)
+        // Most log lines hold no fraction at all; only those with a '/' are scanned
+        if (message.includes('/')) {
+            message = message.replace(FRACTION_PATTERN, (match, numStr, denomStr) => {
+                const num = parseInt(numStr);
+                const denom = parseInt(denomStr);
+                if (denom === 0) return match; // Avoid division by zero issues
+
+                const val = num / denom;
+
+                // Logic: If numbers are "large" (>= 4 digits), simply REPLACE with decimal to reduce noise.
+                // If numbers are small, keep them and APPEND decimal for clarity.
+                if (Math.abs(num) > 999 || denom > 999) {
+                    // e.g. 12345/67890 -> 0.181838
+                    return val.toPrecision(6).replace(/\.?0+$/, '');
                 }
+                // e.g. 1/3 -> 1/3 (= 0.333333)
+                return `${match} (= ${val.toPrecision(6).replace(/\.?0+$/, '')})`;
             });
+        }
 
-            this.onLog({
-                id: uuidv4(),
-                type,
-                message,
-                timestamp: Date.now(),
-            });
-        };
+        this.onLog({
+            id: uuidv4(),
+            type,
+            message,
+            timestamp: Date.now(),
+        });
+    };
 
-        const plot = (data: any[], layout?: any, frames?: any[], config?: any) => {
-            // Deep clone to detach from iframe context
-            const safeData = JSON.parse(JSON.stringify(data));
-            const safeLayout = JSON.parse(JSON.stringify(layout || {}));
-            const safeFrames = frames ? JSON.parse(JSON.stringify(frames)) : undefined;
-            const safeConfig = config ? JSON.parse(JSON.stringify(config)) : undefined;
-
-            this.onPlot({
-                id: uuidv4(),
-                data: safeData,
-                layout: safeLayout,
-                frames: safeFrames,
-                config: safeConfig,
-                timestamp: Date.now(),
-            });
-        };
+    private plot = (data: any[], layout?: any, frames?: any[], config?: any) => {
+        // Deep clone to detach from iframe context; absent parts are never cloned
+        const safeData = detach(data);
+        const safeLayout = layout ? detach(layout) : {};
+        const safeFrames = frames ? detach(frames) : undefined;
+        const safeConfig = config ? detach(config) : undefined;
+
+        this.onPlot({
+            id: uuidv4(),
+            data: safeData,
+            layout: safeLayout,
+            frames: safeFrames,
+            config: safeConfig,
+            timestamp: Date.now(),
+        });
+    };
+
+    private interact = (controls: Record<string, ControlDef>, callback: Function) => {
+        const id = uuidv4();
+        this.interactionCallbacks[id] = callback;
+
+        // Notify UI to render controls
+        this.onInteract({ id, controls });
+
+        // Execute immediately with initial values to generate first plot
+        // We need to extract initial values from the ControlDef
+        const initialValues: Record<string, number> = {};
+        for (const key in controls) {
+            initialValues[key] = controls[key].value;
+        }
+
+        // Wrap the callback to inject the interaction ID into any plots generated
+        // This is a bit tricky since 'plot' is global. We might need to set a context.
+        // For now, simpler approach: The user calls plot inside the callback.
+        // We can't easily adhere the ID to the plot unless we change win.plot dynamically.
 
+        // Execute callback with initial values
         try {
-            return this.executeInIframe(code, plot, safeLog);
+            callback(initialValues);
+        } catch (e: any) {
+            this.safeLog('error', `Interaction Init Error: ${e.message}`);
+        }
+    };
+
+    private print = (...args: any[]) => this.safeLog('log', ...args);
+
+    public async execute(code: string) {
+        try {
+            return this.executeInIframe(code);
         } catch (err: any) {
-            safeLog('error', err.message);
+            this.safeLog('error', err.message);
         }
     }
 
@@ -421,7 +542,7 @@ class Runtime {
     }
 
     private iframe: HTMLIFrameElement | null = null;
-    private initialKeys: Set<string> = new Set();
+    private initialKeys: ReadonlySet<string> | null = null;
 
     private initIframe() {
         if (this.iframe) return;
@@ -446,47 +567,25 @@ class Runtime {
         win.nerdamer = nerdamer;
         win.Algebrite = Algebrite;
 
-        // Capture initial state
-        this.initialKeys = new Set(Object.getOwnPropertyNames(win));
-        for (const key in win) {
-            this.initialKeys.add(key);
+        // Capture initial state. Every fresh iframe exposes the same built-ins, so the
+        // window scan runs once and later resets reuse the set.
+        if (!this.initialKeys) {
+            const keys = new Set(Object.getOwnPropertyNames(win));
+            for (const key in win) {
+                keys.add(key);
+            }
+            this.initialKeys = keys;
         }
     }
 
-    private async executeInIframe(code: string, plot: any, safeLog: any) {
+    private async executeInIframe(code: string) {
         if (!this.iframe) this.initIframe();
-        const win = this.iframe!.contentWindow as any;
-
-        // Define interact function in the iframe scope
-        win.interact = (controls: Record<string, ControlDef>, callback: Function) => {
-            const id = uuidv4();
-            this.interactionCallbacks[id] = callback;
+        const win = this.iframe!.contentWindow as unknown as RuntimeContext;
 
-            // Notify UI to render controls
-            this.onInteract({ id, controls });
-
-            // Execute immediately with initial values to generate first plot
-            // We need to extract initial values from the ControlDef
-            const initialValues: Record<string, number> = {};
-            for (const key in controls) {
-                initialValues[key] = controls[key].value;
-            }
-
-            // Wrap the callback to inject the interaction ID into any plots generated
-            // This is a bit tricky since 'plot' is global. We might need to set a context.
-            // For now, simpler approach: The user calls plot inside the callback.
-            // We can't easily adhere the ID to the plot unless we change win.plot dynamically.
-
-            // Execute callback with initial values
-            try {
-                callback(initialValues);
-            } catch (e: any) {
-                safeLog('error', `Interaction Init Error: ${e.message}`);
-            }
-        };
-
-        win.plot = plot;
-        win.print = (...args: any[]) => safeLog('log', ...args);
+        // Reinstalled on every run: user code can shadow them (`let plot = ...` becomes `var plot`)
+        win.interact = this.interact;
+        win.plot = this.plot;
+        win.print = this.print;
 
         const processedCode = this.preprocessCode(code);
 
@@ -499,17 +598,22 @@ class Runtime {
 
             this.harvestVariables(win, processedCode);
         } catch (e: any) {
-            safeLog('error', e.toString());
+            this.safeLog('error', e.toString());
         }
     }
 
     private preprocessCode(code: string): string {
+        // Each rewrite is gated on a substring test, so snippets without the keyword skip the regex pass
+
         // 1. Convert class declarations to var expressions to allow redeclaration
         // class Foo {} -> var Foo = class Foo {}
-        code = code.replace(/class\s+([a-zA-Z_$][\w$]*)/g, 'var $1 = class $1');
+        if (code.includes('class')) {
+            code = code.replace(/class\s+([a-zA-Z_$][\w$]*)/g, 'var $1 = class $1');
+        }
 
         // 2. Convert const/let to var to allow redeclaration, EXCEPT in for-loops
         // We want to preserve 'for (let i...' because that creates necessary closure scopes
+        if (!code.includes('const') && !code.includes('let')) return code;
         return code.replace(/(for\s*\(\s*let\b)|(\b(const|let)\b)/g, (_match, forGroup, _varGroup) => {
             if (forGroup) return forGroup; // Keep 'for (let' as is
             return 'var'; // Replace other const/let with var
@@ -517,24 +621,28 @@ class Runtime {
     }
 
     private harvestVariables(win: any, code: string) {
-        const injected = new Set(['plot', 'print', 'math', 'nerdamer', 'Algebrite', 'console', 'interact']);
         const vars: Record<string, any> = {};
         const currentKeys = Object.getOwnPropertyNames(win);
 
         // 1. Capture Standard Globals (var, function, explicit window.x = ...)
         for (const key of currentKeys) {
-            if (!this.initialKeys.has(key) && !injected.has(key) && win[key] !== win) {
+            if (!this.initialKeys?.has(key) && !INJECTED_GLOBALS.has(key) && win[key] !== win) {
                 vars[key] = win[key];
             }
         }
 
         // 2. Capture Let/Const/Class from top-level code (Regex parsing)
         // Note: This is a best-effort parser for top-level declarations
+        // Each declared name is evaluated at most once, and not at all when step 1 already
+        // captured it from the window (most declarations, since const/let become var)
         const variableRegex = /(?:let|const|var|class|function)\s+([a-zA-Z_$][0-9a-zA-Z_$]*)/g;
+        const seen = new Set<string>();
         let match;
         while ((match = variableRegex.exec(code)) !== null) {
             const name = match[1];
-            if (!injected.has(name) && !this.initialKeys.has(name)) {
+            if (seen.has(name) || Object.prototype.hasOwnProperty.call(vars, name)) continue;
+            seen.add(name);
+            if (!INJECTED_GLOBALS.has(name) && !this.initialKeys?.has(name)) {
                 try {
                     // We must evaluate to get the value because let/const are not on 'window'
                     const value = win.eval(name);